@@ -3,11 +3,44 @@
 分析定投和抄底金额比例的合理性
 基于历史AHR999数据分析不同区间的出现频率和后续收益
 """
+import sys
 import numpy as np
-from datetime import datetime, timedelta
+from src.data.ahr999_calculator import AHR999Calculator
 from src.data.price_fetcher import PriceFetcher
 from src.utils.logger import get_logger
 
+
+def _median(values):
+    """用快速选择求中位数（O(N)，无需完整排序）"""
+    k = len(values) // 2
+    if len(values) % 2:
+        return np.partition(values, k)[k]
+    part = np.partition(values, [k - 1, k])
+    return (part[k - 1] + part[k]) / 2
+
+
+def zone_return_stats(returns, bins, n_zones=3):
+    """
+    按区间分组统计收益
+    
+    一次稳定排序把各区间的收益排成连续的子数组，再逐段求均值和中位数
+    
+    Returns:
+        每个区间的 (平均收益, 中位数)，区间内无数据时为None
+    """
+    order = np.argsort(bins, kind='stable')
+    sorted_returns = returns[order]
+    split_idx = np.searchsorted(bins[order], np.arange(1, n_zones))
+    
+    stats = []
+    for zone_returns in np.split(sorted_returns, split_idx):
+        if zone_returns.size:
+            stats.append((zone_returns.mean(), _median(zone_returns)))
+        else:
+            stats.append(None)
+    return stats
+
+
 def analyze_ahr999_distribution():
     """分析AHR999在不同区间的分布"""
     logger = get_logger()
@@ -15,112 +48,87 @@ def analyze_ahr999_distribution():
     
     # 获取3年历史数据
     days = 1200
-    historical_data = fetcher.get_historical_prices("BTC/USDT", days=days)
-    
-    dates = [d[0] for d in historical_data]
-    prices = [d[1] for d in historical_data]
+    dates, prices = fetcher.get_historical_prices("BTC/USDT", days=days)
     
     logger.info(f"Analyzing {len(dates)} days from {dates[0]} to {dates[-1]}")
     
-    # 计算AHR999
-    genesis_date = datetime(2009, 1, 3)
-    ahr999_values = []
-    valid_dates = []
-    valid_prices = []
+    # 计算AHR999，第i天的MA200取前200天（不含当天）的收盘价均值
+    calculator = AHR999Calculator(fetcher, ma_days=200)
+    ahr999_series = calculator.calculate_series(prices, dates, ma_lag=1)
     
-    for i in range(200, len(prices)):  # 需要200天数据计算MA
-        # 200日MA
-        ma200 = np.mean(prices[i-200:i])
-        
-        # 拟合价格
-        days_since_genesis = (dates[i] - genesis_date).days
-        fitted_price = 10 ** (5.84 * np.log10(days_since_genesis) - 17.01)
-        
-        # AHR999
-        ahr999 = (prices[i] / ma200) * (prices[i] / fitted_price)
-        
-        ahr999_values.append(ahr999)
-        valid_dates.append(dates[i])
-        valid_prices.append(prices[i])
-    
-    # 统计不同区间的出现频率
-    bottom_zone = sum(1 for v in ahr999_values if v < 0.45)
-    dca_zone = sum(1 for v in ahr999_values if 0.45 <= v < 1.2)
-    hold_zone = sum(1 for v in ahr999_values if v >= 1.2)
+    # 前200天作为MA预热期，不参与统计
+    valid_prices = prices[200:]
+    ahr999_values = ahr999_series[200:]
+    valid_dates = dates[200:]
+    
+    # 报告逐行收集，最后一次性输出
+    lines = []
+    
+    # 统计不同区间的出现频率（0: 抄底区, 1: 定投区, 2: 观望区）
+    zone_bins = np.digitize(ahr999_values, [0.45, 1.2])
+    bottom_zone, dca_zone, hold_zone = np.bincount(zone_bins, minlength=3)
     total = len(ahr999_values)
     
-    print("\n" + "="*70)
-    print("AHR999 历史分布分析（近3年）")
-    print("="*70)
-    print(f"分析期间: {valid_dates[0].strftime('%Y-%m-%d')} 至 {valid_dates[-1].strftime('%Y-%m-%d')}")
-    print(f"总天数: {total} 天")
-    print("-"*70)
-    print(f"{'区间':<15} {'天数':>8} {'占比':>10} {'说明'}")
-    print("-"*70)
-    print(f"{'抄底区 (<0.45)':<15} {bottom_zone:>8} {bottom_zone/total*100:>9.1f}% {'极度低估，大额买入'}")
-    print(f"{'定投区 [0.45,1.2)':<15} {dca_zone:>8} {dca_zone/total*100:>9.1f}% {'合理区间，定期买入'}")
-    print(f"{'观望区 (>=1.2)':<15} {hold_zone:>8} {hold_zone/total*100:>9.1f}% {'高估区间，不建议买入'}")
-    print("="*70)
+    lines.append("\n" + "="*70)
+    lines.append("AHR999 历史分布分析（近3年）")
+    lines.append("="*70)
+    lines.append(f"分析期间: {valid_dates[0]} 至 {valid_dates[-1]}")
+    lines.append(f"总天数: {total} 天")
+    lines.append("-"*70)
+    lines.append(f"{'区间':<15} {'天数':>8} {'占比':>10} {'说明'}")
+    lines.append("-"*70)
+    lines.append(f"{'抄底区 (<0.45)':<15} {bottom_zone:>8} {bottom_zone/total*100:>9.1f}% {'极度低估，大额买入'}")
+    lines.append(f"{'定投区 [0.45,1.2)':<15} {dca_zone:>8} {dca_zone/total*100:>9.1f}% {'合理区间，定期买入'}")
+    lines.append(f"{'观望区 (>=1.2)':<15} {hold_zone:>8} {hold_zone/total*100:>9.1f}% {'高估区间，不建议买入'}")
+    lines.append("="*70)
     
     # 分析后续收益（30天、90天、180天）
-    print("\n" + "="*70)
-    print("不同区间买入后的平均收益分析")
-    print("="*70)
+    lines.append("\n" + "="*70)
+    lines.append("不同区间买入后的平均收益分析")
+    lines.append("="*70)
     
     periods = [30, 90, 180]
+    zone_stats_by_period = {}
     
     for period in periods:
-        print(f"\n持有 {period} 天后的平均收益:")
-        print("-"*70)
+        lines.append(f"\n持有 {period} 天后的平均收益:")
+        lines.append("-"*70)
         
-        bottom_returns = []
-        dca_returns = []
-        hold_returns = []
+        buy_prices = valid_prices[:-period]
+        returns = (valid_prices[period:] - buy_prices) / buy_prices * 100.0
         
-        for i in range(len(ahr999_values) - period):
-            buy_price = valid_prices[i]
-            sell_price = valid_prices[i + period]
-            return_pct = (sell_price - buy_price) / buy_price * 100
-            
-            if ahr999_values[i] < 0.45:
-                bottom_returns.append(return_pct)
-            elif ahr999_values[i] < 1.2:
-                dca_returns.append(return_pct)
-            else:
-                hold_returns.append(return_pct)
+        # 按买入当天所在区间划分收益
+        bottom_stats, dca_stats, hold_stats = zone_return_stats(returns, zone_bins[:-period])
+        zone_stats_by_period[period] = (bottom_stats, dca_stats, hold_stats)
         
-        if bottom_returns:
-            avg_bottom = np.mean(bottom_returns)
-            med_bottom = np.median(bottom_returns)
-            print(f"  抄底区买入:   平均收益 {avg_bottom:>6.1f}%  |  中位数 {med_bottom:>6.1f}%")
+        if bottom_stats:
+            avg_bottom, med_bottom = bottom_stats
+            lines.append(f"  抄底区买入:   平均收益 {avg_bottom:>6.1f}%  |  中位数 {med_bottom:>6.1f}%")
         
-        if dca_returns:
-            avg_dca = np.mean(dca_returns)
-            med_dca = np.median(dca_returns)
-            print(f"  定投区买入:   平均收益 {avg_dca:>6.1f}%  |  中位数 {med_dca:>6.1f}%")
+        if dca_stats:
+            avg_dca, med_dca = dca_stats
+            lines.append(f"  定投区买入:   平均收益 {avg_dca:>6.1f}%  |  中位数 {med_dca:>6.1f}%")
         
-        if hold_returns:
-            avg_hold = np.mean(hold_returns)
-            med_hold = np.median(hold_returns)
-            print(f"  观望区买入:   平均收益 {avg_hold:>6.1f}%  |  中位数 {med_hold:>6.1f}%")
+        if hold_stats:
+            avg_hold, med_hold = hold_stats
+            lines.append(f"  观望区买入:   平均收益 {avg_hold:>6.1f}%  |  中位数 {med_hold:>6.1f}%")
     
     # 计算合理的投资比例建议
-    print("\n" + "="*70)
-    print("投资金额比例建议")
-    print("="*70)
+    lines.append("\n" + "="*70)
+    lines.append("投资金额比例建议")
+    lines.append("="*70)
     
     # 基于频率和收益的综合分析
     bottom_freq = bottom_zone / total
     dca_freq = dca_zone / total
     
-    # 计算180天收益比
-    if bottom_returns and dca_returns:
-        avg_bottom_180 = np.mean([r for i, r in enumerate([(valid_prices[i+180] - valid_prices[i])/valid_prices[i]*100 
-                                                            for i in range(len(ahr999_values)-180)]) 
-                                  if i < len(ahr999_values)-180 and ahr999_values[i] < 0.45])
-        avg_dca_180 = np.mean([r for i, r in enumerate([(valid_prices[i+180] - valid_prices[i])/valid_prices[i]*100 
-                                                         for i in range(len(ahr999_values)-180)]) 
-                               if i < len(ahr999_values)-180 and 0.45 <= ahr999_values[i] < 1.2])
+    # 计算180天收益比（复用上面已计算的180天收益统计）
+    bottom_stats_180, dca_stats_180, _ = zone_stats_by_period[180]
+    has_180_returns = bottom_stats_180 is not None and dca_stats_180 is not None
+    
+    if has_180_returns:
+        avg_bottom_180 = bottom_stats_180[0]
+        avg_dca_180 = dca_stats_180[0]
         
         # 收益倍数比
         if avg_dca_180 > 0:
@@ -143,31 +151,33 @@ def analyze_ahr999_distribution():
     base_dca = 100
     suggested_bottom = base_dca * suggested_ratio
     
-    print(f"\n分析依据:")
-    print(f"  1. 抄底区出现频率: {bottom_freq*100:.1f}% (稀缺性: {scarcity_ratio:.1f}x)")
-    print(f"  2. 定投区出现频率: {dca_freq*100:.1f}%")
-    if bottom_returns and dca_returns:
-        print(f"  3. 抄底区180天平均收益: {avg_bottom_180:.1f}%")
-        print(f"  4. 定投区180天平均收益: {avg_dca_180:.1f}%")
-        print(f"  5. 收益倍数比: {return_ratio:.1f}x")
+    lines.append(f"\n分析依据:")
+    lines.append(f"  1. 抄底区出现频率: {bottom_freq*100:.1f}% (稀缺性: {scarcity_ratio:.1f}x)")
+    lines.append(f"  2. 定投区出现频率: {dca_freq*100:.1f}%")
+    if has_180_returns:
+        lines.append(f"  3. 抄底区180天平均收益: {avg_bottom_180:.1f}%")
+        lines.append(f"  4. 定投区180天平均收益: {avg_dca_180:.1f}%")
+        lines.append(f"  5. 收益倍数比: {return_ratio:.1f}x")
     
-    print(f"\n建议配置:")
-    print(f"  定投金额 (0.45 ≤ AHR999 < 1.2):  {base_dca} USDT")
-    print(f"  抄底金额 (AHR999 < 0.45):        {suggested_bottom:.0f} USDT")
-    print(f"  比例: 1 : {suggested_ratio:.1f}")
+    lines.append(f"\n建议配置:")
+    lines.append(f"  定投金额 (0.45 ≤ AHR999 < 1.2):  {base_dca} USDT")
+    lines.append(f"  抄底金额 (AHR999 < 0.45):        {suggested_bottom:.0f} USDT")
+    lines.append(f"  比例: 1 : {suggested_ratio:.1f}")
     
-    print(f"\n说明:")
-    print(f"  - 抄底区更稀缺（出现频率仅{bottom_freq*100:.1f}%），应加大投入")
-    print(f"  - 抄底区后续收益通常更高，风险收益比更优")
-    print(f"  - 建议比例综合考虑了稀缺性和收益率")
+    lines.append(f"\n说明:")
+    lines.append(f"  - 抄底区更稀缺（出现频率仅{bottom_freq*100:.1f}%），应加大投入")
+    lines.append(f"  - 抄底区后续收益通常更高，风险收益比更优")
+    lines.append(f"  - 建议比例综合考虑了稀缺性和收益率")
     
     # 给出不同风险偏好的建议
-    print(f"\n不同风险偏好建议:")
-    print(f"  保守型:   定投100U / 抄底150U  (比例 1:1.5)")
-    print(f"  平衡型:   定投100U / 抄底{suggested_bottom:.0f}U  (比例 1:{suggested_ratio:.1f})")
-    print(f"  激进型:   定投100U / 抄底{suggested_bottom*1.5:.0f}U  (比例 1:{suggested_ratio*1.5:.1f})")
+    lines.append(f"\n不同风险偏好建议:")
+    lines.append(f"  保守型:   定投100U / 抄底150U  (比例 1:1.5)")
+    lines.append(f"  平衡型:   定投100U / 抄底{suggested_bottom:.0f}U  (比例 1:{suggested_ratio:.1f})")
+    lines.append(f"  激进型:   定投100U / 抄底{suggested_bottom*1.5:.0f}U  (比例 1:{suggested_ratio*1.5:.1f})")
+    
+    lines.append("\n" + "="*70)
     
-    print("\n" + "="*70)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
@@ -138,8 +138,8 @@ def validate_config(config):
         return False
 
 
-def execute_strategy(config, dry_run=False):
-    """执行投资策略"""
+def build_strategy(config):
+    """创建交易所连接及策略组件"""
     logger = get_logger(
         log_dir=config.get('logging.log_dir', 'logs'),
         log_level=config.get('logging.level', 'INFO')
@@ -151,11 +151,18 @@ def execute_strategy(config, dry_run=False):
     exchange = ExchangeFactory.create_exchange(exchange_name, credentials)
     exchange.connect()
     
-    price_fetcher = PriceFetcher(exchange_name)
+    # 复用交易所已建立的CCXT连接获取行情，避免重复创建客户端和加载市场
+    price_fetcher = PriceFetcher(exchange_name, ccxt_client=exchange.exchange)
     ma_days = config.get('ahr999.ma_days', 200)
-    calculator = AHR999Calculator(price_fetcher, ma_days)
+    state_path = config.get('ahr999.state_path')
+    calculator = AHR999Calculator(price_fetcher, ma_days, state_path=state_path)
     
-    strategy = InvestmentStrategy(calculator, exchange, config.config)
+    return InvestmentStrategy(calculator, exchange, config.config)
+
+
+def execute_strategy(config, dry_run=False):
+    """执行投资策略"""
+    strategy = build_strategy(config)
     
     # 执行策略
     result = strategy.execute(dry_run=dry_run)
@@ -245,8 +252,14 @@ def main():
             minute = config_loader.get('scheduler.minute', 0)
             timezone = config_loader.get('scheduler.timezone', 'Asia/Shanghai')
             
+            # 策略组件在各次定时执行间复用，保留交易所的连接池和缓存
+            strategy = None
+            
             def execute_task():
-                execute_strategy(config_loader, dry_run=args.dry_run)
+                nonlocal strategy
+                if strategy is None:
+                    strategy = build_strategy(config_loader)
+                strategy.execute(dry_run=args.dry_run)
             
             scheduler = InvestmentScheduler(
                 execute_func=execute_task,
@@ -2,30 +2,78 @@
 AHR999指标计算模块
 计算AHR999指数：(当前价格/200日定投成本) * (当前价格/拟合价格)
 """
-from typing import List, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+import json
+import math
+import os
+import time
 import numpy as np
 from src.data.price_fetcher import PriceFetcher
 from src.utils.logger import get_logger
 
 
+@lru_cache(maxsize=8192)
+def _fitted_price_for(days_since_genesis: int) -> float:
+    """按距创世区块天数计算拟合价格（结果缓存，每天只计算一次）"""
+    if days_since_genesis > 0:
+        return 10.0 ** (5.84 * math.log10(days_since_genesis) - 17.01)
+    return 1.0  # fallback
+
+
+def _ahr999_series_numpy(prices: np.ndarray, days_since_genesis: np.ndarray,
+                         window: int, lag: int, out: np.ndarray) -> np.ndarray:
+    """AHR999序列的NumPy实现，从第window-1+lag天开始写入out"""
+    start = window - 1 + lag
+    c = np.concatenate(([0.0], np.cumsum(prices)))
+    ma = (c[window:] - c[:-window])[:len(prices) - start] / window
+    days = days_since_genesis[start:]
+    fitted = np.where(days > 0, 10 ** (5.84 * np.log10(np.maximum(days, 1)) - 17.01), 1.0)
+    p = prices[start:]
+    out[start:] = (p / ma) * (p / fitted)
+    return out
+
+
+def _load_numba_kernel():
+    """按需导入Numba内核，numba为可选依赖，未安装时返回None"""
+    try:
+        from src.data.ahr999_numba import ahr999_series
+    except ImportError:
+        return None
+    return ahr999_series
+
+
 class AHR999Calculator:
     """AHR999指标计算器"""
     
     # Bitcoin创世区块日期
     GENESIS_DATE = datetime(2009, 1, 3)
     
-    def __init__(self, price_fetcher: PriceFetcher, ma_days: int = 200):
+    # 序列长度达到该值时才使用Numba内核。导入numba约0.2秒，首次调用还需
+    # JIT编译（冷缓存约1秒，磁盘缓存命中约0.35秒），而NumPy实现计算100万点
+    # 约需40毫秒，内核只在千万点级别的序列上才能抵消这部分开销
+    NUMBA_MIN_LENGTH = 10_000_000
+    
+    def __init__(self, price_fetcher: PriceFetcher, ma_days: int = 200,
+                 state_path: Optional[str] = None, cache_ttl: float = 300.0):
         """
         初始化AHR999计算器
         
         Args:
             price_fetcher: 价格获取器
             ma_days: 移动平均天数
+            state_path: 滚动MA状态文件路径，设置后每日只增量获取新收盘的K线
+            cache_ttl: 同一天内计算结果的缓存秒数，0表示不缓存
         """
         self.price_fetcher = price_fetcher
         self.ma_days = ma_days
+        self.state_path = state_path
+        self.cache_ttl = cache_ttl
         self.logger = get_logger()
+        
+        # (交易对, UTC日期) -> (缓存时间, AHR999值, 详细信息)
+        self._cache: Dict[Tuple[str, date], Tuple[float, float, dict]] = {}
     
     def calculate(self, symbol: str = "BTC/USDT") -> Tuple[float, dict]:
         """
@@ -38,29 +86,39 @@ class AHR999Calculator:
             (AHR999值, 详细信息字典)
         """
         try:
+            # 同一交易对同一天内重复调用时直接复用结果
+            key = (symbol, datetime.now(timezone.utc).date())
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1], dict(cached[2])
+            
             # 获取当前价格
             current_price = self.price_fetcher.get_current_price(symbol)
             
-            # 获取历史价格数据
-            history_days = self.ma_days + 50  # 多获取一些数据以确保足够
-            historical_prices = self.price_fetcher.get_historical_prices(
-                symbol, 
-                days=history_days
-            )
-            
-            # 确保有足够的历史数据
-            if len(historical_prices) < self.ma_days:
-                raise ValueError(
-                    f"Insufficient historical data: {len(historical_prices)} days, "
-                    f"required: {self.ma_days} days"
+            if self.state_path:
+                # 使用持久化的滚动窗口增量计算MA
+                ma_price, data_points = self._calculate_ma_from_state(symbol, current_price)
+            else:
+                # 获取历史价格数据
+                history_days = self.ma_days + 50  # 多获取一些数据以确保足够
+                _, closes = self.price_fetcher.get_historical_prices(
+                    symbol, 
+                    days=history_days
                 )
-            
-            # 计算200日移动平均价格（定投成本）
-            recent_prices = [price for _, price in historical_prices[-self.ma_days:]]
-            ma_price = np.mean(recent_prices)
+                
+                # 确保有足够的历史数据
+                if len(closes) < self.ma_days:
+                    raise ValueError(
+                        f"Insufficient historical data: {len(closes)} days, "
+                        f"required: {self.ma_days} days"
+                    )
+                
+                # 计算200日移动平均价格（定投成本）
+                ma_price = np.mean(closes[-self.ma_days:])
+                data_points = len(closes)
             
             # 计算拟合价格
-            fitted_price = self._calculate_fitted_price(historical_prices)
+            fitted_price = self._calculate_fitted_price()
             
             # 计算AHR999
             ahr999 = (current_price / ma_price) * (current_price / fitted_price)
@@ -72,7 +130,7 @@ class AHR999Calculator:
                 'fitted_price': fitted_price,
                 'ahr999': ahr999,
                 'timestamp': datetime.now(),
-                'data_points': len(historical_prices)
+                'data_points': data_points
             }
             
             self.logger.info(
@@ -82,13 +140,162 @@ class AHR999Calculator:
                 f"Fitted: ${fitted_price:.2f}"
             )
             
-            return ahr999, details
+            if self.cache_ttl > 0:
+                for stale_key in [k for k in self._cache if k[1] != key[1]]:
+                    del self._cache[stale_key]
+                self._cache[key] = (time.monotonic(), ahr999, details)
+            
+            return ahr999, dict(details)
             
         except Exception as e:
             self.logger.error(f"Error calculating AHR999: {str(e)}")
             raise
     
-    def _calculate_fitted_price(self, historical_prices: List[Tuple[datetime, float]]) -> float:
+    def calculate_series(self, prices: Sequence[float], dates: Sequence,
+                         ma_lag: int = 0) -> np.ndarray:
+        """
+        计算整段历史的AHR999序列（用于回测和分析脚本）
+        
+        默认MA窗口包含当天收盘价，与calculate的口径一致。默认使用NumPy实现；
+        序列长度不小于NUMBA_MIN_LENGTH且已安装numba时改用并行Numba内核，
+        首次调用需承担numba导入和JIT编译的开销（约0.5~1.3秒）
+        
+        Args:
+            prices: 每日收盘价
+            dates: 与价格对应的日期
+            ma_lag: MA窗口向前平移的天数，1表示取前ma_days天（不含当天）
+            
+        Returns:
+            AHR999数组，前ma_days-1+ma_lag个值为NaN
+        """
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        days_since_genesis = np.ascontiguousarray(
+            (dates - np.datetime64(self.GENESIS_DATE.date())).astype(np.int64)
+        )
+        
+        ahr999 = np.full(len(prices), np.nan)
+        if len(prices) >= self.ma_days + ma_lag:
+            kernel = None
+            if len(prices) >= self.NUMBA_MIN_LENGTH:
+                kernel = _load_numba_kernel()
+            if kernel is None:
+                kernel = _ahr999_series_numpy
+            kernel(prices, days_since_genesis, self.ma_days, ma_lag, ahr999)
+        return ahr999
+    
+    def _calculate_ma_from_state(self, symbol: str, current_price: float) -> Tuple[float, int]:
+        """
+        基于持久化滚动窗口计算MA
+        
+        状态保存最近ma_days根已收盘日K线的收盘价、总和及最后一根的开盘
+        时间，每天只需补充新收盘的K线并执行 sum += new - oldest。K线是否
+        收盘按 开盘时间 + 1天 <= 当前时间 判断，不依赖交易所按UTC零点切分
+        日K线（如OKX的日K线在UTC 16:00开盘）。未收盘的K线以当前价格计入，
+        与全量计算的口径一致。
+        
+        Args:
+            symbol: 交易对
+            current_price: 当前价格
+            
+        Returns:
+            (MA价格, 窗口数据点数)
+        """
+        day_ms = PriceFetcher.DAY_MS
+        now_ms = int(time.time() * 1000)
+        state = self._load_ma_state(symbol)
+        
+        if state is None:
+            state = self._rebuild_ma_state(symbol, now_ms)
+        else:
+            last_open = state['last_open']
+            # 上次记录之后应已收盘的K线数量
+            missing = (now_ms - day_ms - last_open) // day_ms
+            
+            if missing < 0 or missing >= self.ma_days:
+                state = self._rebuild_ma_state(symbol, now_ms)
+            elif missing > 0:
+                open_times, closes = self.price_fetcher.get_daily_candles(
+                    symbol,
+                    days=missing + 2
+                )
+                new_mask = (open_times > last_open) & (open_times + day_ms <= now_ms)
+                
+                if np.count_nonzero(new_mask) != missing:
+                    # K线有缺口，直接重建窗口
+                    state = self._rebuild_ma_state(symbol, now_ms)
+                else:
+                    window = state['window']
+                    for close in closes[new_mask].tolist():
+                        state['sum'] += close - window[0]
+                        window = window[1:] + [close]
+                    state['window'] = window
+                    state['last_open'] = int(open_times[new_mask][-1])
+                    self._save_ma_state(state)
+        
+        window = state['window']
+        ma_price = (state['sum'] - window[0] + current_price) / self.ma_days
+        return ma_price, len(window)
+    
+    def _rebuild_ma_state(self, symbol: str, now_ms: int) -> dict:
+        """获取历史数据，重建并保存滚动MA状态"""
+        history_days = self.ma_days + 50
+        open_times, closes = self.price_fetcher.get_daily_candles(symbol, days=history_days)
+        closed_mask = open_times + PriceFetcher.DAY_MS <= now_ms
+        closed = closes[closed_mask]
+        
+        if len(closed) < self.ma_days:
+            raise ValueError(
+                f"Insufficient historical data: {len(closed)} days, "
+                f"required: {self.ma_days} days"
+            )
+        
+        window = closed[-self.ma_days:].tolist()
+        state = {
+            'symbol': symbol,
+            'sum': float(sum(window)),
+            'window': window,
+            'last_open': int(open_times[closed_mask][-1])
+        }
+        self._save_ma_state(state)
+        
+        last_open = datetime.fromtimestamp(state['last_open'] / 1000, tz=timezone.utc)
+        self.logger.info(f"Rebuilt MA{self.ma_days} state up to {last_open:%Y-%m-%d %H:%M} UTC")
+        return state
+    
+    def _load_ma_state(self, symbol: str) -> Optional[dict]:
+        """读取滚动MA状态，不存在或与当前配置不匹配时返回None"""
+        if not os.path.exists(self.state_path):
+            return None
+        
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            
+            if state.get('symbol') != symbol or len(state.get('window', [])) != self.ma_days:
+                return None
+            if not isinstance(state.get('last_open'), int):
+                return None  # 旧版按UTC日期记录的状态，重建
+            return state
+        except Exception as e:
+            self.logger.warning(f"Error loading MA state {self.state_path}: {str(e)}")
+            return None
+    
+    def _save_ma_state(self, state: dict):
+        """保存滚动MA状态（先写临时文件再替换）"""
+        try:
+            state_dir = os.path.dirname(self.state_path)
+            if state_dir:
+                os.makedirs(state_dir, exist_ok=True)
+            
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            self.logger.warning(f"Error saving MA state {self.state_path}: {str(e)}")
+    
+    def _calculate_fitted_price(self, historical_prices: Optional[List[Tuple[datetime, float]]] = None) -> float:
         """
         计算BTC拟合价格（使用AHR999标准公式）
         
@@ -101,18 +308,16 @@ class AHR999Calculator:
         Returns:
             拟合价格
         """
-        # 计算当前距离创世区块的天数
-        days_since_genesis = (datetime.now() - self.GENESIS_DATE).days
+        # 计算当前距离创世区块的天数（与日K线一致按UTC日期计算）
+        today = datetime.now(timezone.utc).date()
+        days_since_genesis = (today - self.GENESIS_DATE.date()).days
         
         # 使用AHR999标准公式: Price = 10^(5.84 * log10(days) - 17.01)
-        if days_since_genesis > 0:
-            fitted_price = 10 ** (5.84 * np.log10(days_since_genesis) - 17.01)
-        else:
-            fitted_price = 1  # fallback
+        fitted_price = _fitted_price_for(days_since_genesis)
         
         self.logger.debug(
-            f"Fitted price calculation: days_since_genesis={days_since_genesis}, "
-            f"fitted_price=${fitted_price:.2f}"
+            "Fitted price calculation: days_since_genesis=%d, fitted_price=$%.2f",
+            days_since_genesis, fitted_price
         )
         
         return fitted_price
@@ -0,0 +1,39 @@
+"""
+AHR999序列的Numba内核
+仅在计算超长序列时由AHR999Calculator.calculate_series按需导入
+"""
+import numpy as np
+from numba import config as numba_config, njit, prange
+
+_NUM_THREADS = numba_config.NUMBA_NUM_THREADS
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def ahr999_series(prices, days_since_genesis, window, lag, out):
+    """
+    AHR999序列的融合内核（MA、拟合价格、AHR999一次写入out，无中间数组）
+    
+    第i天的MA取截至第i-lag天的window个收盘价。有效区间按线程数切块并行，
+    每块先求一次窗口初始和，块内再滑动累加
+    """
+    n = prices.shape[0]
+    start = window - 1 + lag
+    n_chunks = max(1, min(_NUM_THREADS, (n - start) // window))
+    chunk_size = (n - start + n_chunks - 1) // n_chunks
+    for c in prange(n_chunks):
+        lo = start + c * chunk_size
+        hi = min(lo + chunk_size, n)
+        running_sum = 0.0
+        for j in range(lo - lag - window + 1, lo - lag):
+            running_sum += prices[j]
+        for i in range(lo, hi):
+            running_sum += prices[i - lag]
+            if i > lo:
+                running_sum -= prices[i - lag - window]
+            days = days_since_genesis[i]
+            if days > 0:
+                fitted = 10.0 ** (5.84 * np.log10(days) - 17.01)
+            else:
+                fitted = 1.0
+            out[i] = prices[i] * prices[i] * window / (running_sum * fitted)
+    return out
@@ -2,31 +2,62 @@
 价格数据获取模块
 从交易所获取BTC的实时价格和历史价格数据
 """
-from typing import List, Tuple
-import ccxt
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import time
+import numpy as np
 from src.utils.logger import get_logger
 
 
 class PriceFetcher:
     """价格数据获取器"""
     
-    def __init__(self, exchange_name: str = "binance"):
+    # 日K线周期（毫秒）
+    DAY_MS = 86400 * 1000
+    
+    # 批量获取历史数据时的最大并发线程数
+    MAX_BATCH_WORKERS = 4
+    
+    def __init__(self, exchange_name: Optional[str] = "binance",
+                 cache_dir: Optional[str] = ".cache",
+                 price_ttl: float = 10.0,
+                 ccxt_client=None):
         """
         初始化价格获取器
         
         Args:
-            exchange_name: 交易所名称
+            exchange_name: 交易所名称，传入ccxt_client时可省略
+            cache_dir: 历史K线缓存目录，None表示不使用磁盘缓存
+            price_ttl: 当前价格在进程内的缓存秒数
+            ccxt_client: 已连接的CCXT实例，传入时直接复用其连接和市场数据
         """
         self.logger = get_logger()
+        if exchange_name is None:
+            if ccxt_client is None:
+                raise ValueError("exchange_name or ccxt_client is required")
+            exchange_name = ccxt_client.id
         self.exchange_name = exchange_name.lower()
+        self.cache_dir = cache_dir
+        self.price_ttl = price_ttl
+        self._price_cache = {}
         
-        # 使用CCXT创建交易所实例（公开API，无需密钥）
-        exchange_class = getattr(ccxt, self.exchange_name)
-        self.exchange = exchange_class({
-            'enableRateLimit': True,
-        })
+        # 多线程共享的请求节流状态
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
+        if ccxt_client is not None:
+            self.exchange = ccxt_client
+        else:
+            import ccxt  # 仅在需要自建客户端时导入
+            
+            # 使用CCXT创建交易所实例（公开API，无需密钥）
+            exchange_class = getattr(ccxt, self.exchange_name)
+            self.exchange = exchange_class({
+                'enableRateLimit': True,
+            })
         
         self.logger.info(f"Price fetcher initialized for {self.exchange_name}")
     
@@ -41,16 +72,21 @@ class PriceFetcher:
             当前价格
         """
         try:
+            cached = self._price_cache.get(symbol)
+            if cached is not None and time.monotonic() - cached[0] < self.price_ttl:
+                return cached[1]
+            
             ticker = self.exchange.fetch_ticker(symbol)
             price = ticker['last']
-            self.logger.debug(f"Current {symbol} price: {price}")
+            self._price_cache[symbol] = (time.monotonic(), price)
+            self.logger.debug("Current %s price: %s", symbol, price)
             return price
         except Exception as e:
             self.logger.error(f"Error fetching current price: {str(e)}")
             raise
     
     def get_historical_prices(self, symbol: str = "BTC/USDT", 
-                            days: int = 400) -> List[Tuple[datetime, float]]:
+                            days: int = 400) -> Tuple[np.ndarray, np.ndarray]:
         """
         获取历史价格数据
         
@@ -59,56 +95,230 @@ class PriceFetcher:
             days: 获取天数
             
         Returns:
-            历史价格列表 [(日期, 价格), ...]
+            (日期数组, 收盘价数组)，日期为UTC的datetime64[D]，收盘价为float64
         """
+        return self._historical_prices(symbol, days, self.exchange)
+    
+    def _historical_prices(self, symbol: str, days: int,
+                           client) -> Tuple[np.ndarray, np.ndarray]:
+        """使用指定的CCXT实例获取历史价格数据，返回格式同get_historical_prices"""
         try:
-            self.logger.info(f"Fetching {days} days of historical data for {symbol}")
-            
-            # 计算开始时间（毫秒时间戳）
-            since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
-            
-            # 获取日K线数据
-            ohlcv = []
-            limit = 1000  # 每次请求的最大数量
-            
-            while True:
-                batch = self.exchange.fetch_ohlcv(
-                    symbol, 
-                    timeframe='1d',
-                    since=since,
-                    limit=limit
-                )
-                
-                if not batch:
-                    break
-                
-                ohlcv.extend(batch)
-                
-                # 如果返回数据少于limit，说明已经获取完毕
-                if len(batch) < limit:
-                    break
-                
-                # 更新since为最后一条数据的时间戳
-                since = batch[-1][0] + 1
-                
-                # 避免请求过快
-                time.sleep(self.exchange.rateLimit / 1000)
-            
-            # 转换为 (日期, 收盘价) 格式
-            prices = []
-            for candle in ohlcv:
-                timestamp = candle[0]
-                close_price = candle[4]  # OHLCV中第5个是收盘价
-                date = datetime.fromtimestamp(timestamp / 1000)
-                prices.append((date, close_price))
-            
-            self.logger.info(f"Fetched {len(prices)} days of historical data")
-            return prices
+            ohlcv = self._get_daily_ohlcv(symbol, days, client)
+            
+            # K线时间戳为UTC毫秒
+            dates = ohlcv[:, 0].astype(np.int64).astype('datetime64[ms]').astype('datetime64[D]')
+            closes = np.ascontiguousarray(ohlcv[:, 4])  # OHLCV中第5个是收盘价
+            
+            self.logger.info(f"Fetched {len(closes)} days of historical data")
+            return dates, closes
             
         except Exception as e:
             self.logger.error(f"Error fetching historical prices: {str(e)}")
             raise
     
+    def get_daily_candles(self, symbol: str = "BTC/USDT",
+                          days: int = 400) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        获取日K线的开盘时间和收盘价
+        
+        部分交易所（如OKX）的日K线不按UTC零点切分，需要用开盘时间
+        判断K线是否已收盘，而不是UTC日期
+        
+        Args:
+            symbol: 交易对
+            days: 获取天数
+            
+        Returns:
+            (开盘时间数组, 收盘价数组)，开盘时间为UTC毫秒时间戳（int64）
+        """
+        try:
+            ohlcv = self._get_daily_ohlcv(symbol, days, self.exchange)
+            open_times = ohlcv[:, 0].astype(np.int64)
+            closes = np.ascontiguousarray(ohlcv[:, 4])
+            return open_times, closes
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching daily candles: {str(e)}")
+            raise
+    
+    def _get_daily_ohlcv(self, symbol: str, days: int, client) -> np.ndarray:
+        """获取最近days天的日K线（优先使用磁盘缓存，只补齐缺失的尾部）"""
+        self.logger.info(f"Fetching {days} days of historical data for {symbol}")
+        
+        # 计算开始时间（毫秒时间戳）
+        since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+        
+        # 缓存已覆盖开始时间时，只需补齐缺失的尾部
+        cached = self._load_cached_ohlcv(symbol)
+        if cached is not None and len(cached) and cached[0, 0] - self.DAY_MS < since:
+            # 最后一根K线可能尚未收盘，从它开始重新获取
+            fetch_since = int(cached[-1, 0])
+            cached = cached[cached[:, 0] < fetch_since]
+        else:
+            fetch_since = since
+            cached = None
+        
+        batch = self._fetch_ohlcv_since(symbol, fetch_since, client)
+        if cached is not None:
+            self.logger.debug(
+                "Loaded %d cached candles, fetched %d new", len(cached), len(batch)
+            )
+            all_ohlcv = np.concatenate((cached, batch)) if len(batch) else cached
+        else:
+            all_ohlcv = batch
+        
+        self._save_cached_ohlcv(symbol, all_ohlcv)
+        return all_ohlcv[all_ohlcv[:, 0] >= since]
+    
+    def get_historical_prices_legacy(self, symbol: str = "BTC/USDT",
+                                     days: int = 400) -> List[Tuple[datetime, float]]:
+        """
+        以旧的列表格式获取历史价格数据
+        
+        Args:
+            symbol: 交易对
+            days: 获取天数
+            
+        Returns:
+            历史价格列表 [(日期, 价格), ...]，日期为UTC零点的datetime
+        """
+        dates, closes = self.get_historical_prices(symbol, days)
+        return list(zip(dates.astype('datetime64[ms]').tolist(), closes.tolist()))
+    
+    def get_historical_prices_batch(self, symbols: Iterable[str],
+                                    days: int = 400) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        并发获取多个交易对的历史价格数据
+        
+        同步CCXT实例不是线程安全的，每个工作线程使用自己的公开API客户端，
+        线程之间只共享请求节流状态和磁盘缓存
+        
+        Args:
+            symbols: 交易对列表
+            days: 获取天数
+            
+        Returns:
+            {交易对: (日期数组, 收盘价数组)}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        
+        local = threading.local()
+        
+        def fetch(symbol):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = self._create_public_client()
+            return self._historical_prices(symbol, days, client)
+        
+        max_workers = min(len(symbols), self.MAX_BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {symbol: executor.submit(fetch, symbol) for symbol in symbols}
+            return {symbol: future.result() for symbol, future in futures.items()}
+    
+    def _create_public_client(self):
+        """创建仅用于公开行情的CCXT实例，复用主实例已加载的市场数据"""
+        import ccxt
+        
+        client = getattr(ccxt, self.exchange_name)({
+            'enableRateLimit': True,
+        })
+        if self.exchange.markets:
+            client.set_markets(self.exchange.markets, self.exchange.currencies)
+        return client
+    
+    def _fetch_ohlcv_since(self, symbol: str, since: int, client) -> np.ndarray:
+        """
+        从交易所分页获取自since起的全部日K线
+        
+        Args:
+            symbol: 交易对
+            since: 开始时间（毫秒时间戳）
+            client: 发送请求的CCXT实例
+            
+        Returns:
+            OHLCV数组，形状为 (N, 6)
+        """
+        ohlcv = []
+        limit = 1000  # 每次请求的最大数量
+        
+        while True:
+            self._wait_for_rate_limit()
+            batch = client.fetch_ohlcv(
+                symbol, 
+                timeframe='1d',
+                since=since,
+                limit=limit
+            )
+            
+            if not batch:
+                break
+            
+            ohlcv.extend(batch)
+            
+            # 如果返回数据少于limit，说明已经获取完毕
+            if len(batch) < limit:
+                break
+            
+            # 更新since为最后一条数据的时间戳
+            since = batch[-1][0] + 1
+        
+        return np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+    
+    def _wait_for_rate_limit(self):
+        """
+        按交易所rateLimit为本次请求预约发送时间
+        
+        只在预约时持有锁，等待在锁外进行，其他线程可以同时预约后续时间
+        """
+        interval = self.exchange.rateLimit / 1000
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_at)
+            self._next_request_at = slot + interval
+        
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _cache_path(self, symbol: str) -> Optional[str]:
+        """获取K线缓存文件路径"""
+        if not self.cache_dir:
+            return None
+        filename = f"{self.exchange_name}_{symbol.replace('/', '_')}_1d.npy"
+        return os.path.join(self.cache_dir, filename)
+    
+    def _load_cached_ohlcv(self, symbol: str) -> Optional[np.ndarray]:
+        """读取缓存的K线数据，缓存不存在或损坏时返回None"""
+        path = self._cache_path(symbol)
+        if not path or not os.path.exists(path):
+            return None
+        
+        try:
+            cached = np.load(path)
+            if cached.ndim != 2 or cached.shape[1] != 6:
+                return None
+            return cached
+        except Exception as e:
+            self.logger.warning(f"Error loading price cache {path}: {str(e)}")
+            return None
+    
+    def _save_cached_ohlcv(self, symbol: str, ohlcv: np.ndarray):
+        """写入K线缓存（先写临时文件再替换，避免留下半截文件）"""
+        path = self._cache_path(symbol)
+        if not path:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, ohlcv)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Error saving price cache {path}: {str(e)}")
+    
     def get_ohlcv(self, symbol: str = "BTC/USDT", 
                   timeframe: str = "1d", 
                   limit: int = 400) -> List[List]:
@@ -125,7 +335,7 @@ class PriceFetcher:
         """
         try:
             ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            self.logger.debug(f"Fetched {len(ohlcv)} OHLCV candles")
+            self.logger.debug("Fetched %d OHLCV candles", len(ohlcv))
             return ohlcv
         except Exception as e:
             self.logger.error(f"Error fetching OHLCV data: {str(e)}")
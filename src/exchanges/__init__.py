@@ -1,10 +1,24 @@
 """交易所模块"""
+import importlib
+
 from .base_exchange import BaseExchange
-from .binance_exchange import BinanceExchange
-from .okx_exchange import OKXExchange
-from .bitget_exchange import BitgetExchange
 from .exchange_factory import ExchangeFactory
 
+# 具体交易所实现按需导入（首次访问时才加载对应模块及ccxt）
+_LAZY_EXCHANGES = {
+    'BinanceExchange': '.binance_exchange',
+    'OKXExchange': '.okx_exchange',
+    'BitgetExchange': '.bitget_exchange',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXCHANGES:
+        module = importlib.import_module(_LAZY_EXCHANGES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     'BaseExchange',
     'BinanceExchange', 
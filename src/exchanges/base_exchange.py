@@ -4,12 +4,21 @@
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Optional
+import json
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from src.utils.logger import get_logger
 
 
 class BaseExchange(ABC):
     """交易所基类"""
     
+    # 市场信息缓存目录
+    MARKETS_CACHE_DIR = ".cache"
+    
     def __init__(self, api_key: str, api_secret: str, passphrase: Optional[str] = None):
         """
         初始化交易所
@@ -24,6 +33,101 @@ class BaseExchange(ABC):
         self.passphrase = passphrase
         self.logger = get_logger()
         self.exchange = None
+        
+        # 长期持有的HTTP会话，在多次请求间复用连接池和TLS会话
+        self.session = self._create_session()
+    
+    @property
+    def client(self):
+        """已连接的CCXT实例，尚未连接时先自动连接"""
+        if self.exchange is None:
+            self.connect()
+        return self.exchange
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """
+        创建带连接池和重试策略的HTTP会话
+        
+        只重试连接错误，429/5xx等HTTP状态码交由CCXT识别为RateLimitExceeded
+        等具体异常。Retry默认只重试幂等请求（GET等），下单的POST请求不会
+        被重复提交
+        """
+        session = requests.Session()
+        # 与CCXT默认会话一致，不读取环境变量中的代理和.netrc
+        session.trust_env = False
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=()
+            )
+        )
+        session.mount('https://', adapter)
+        return session
+    
+    def _load_markets_cached(self, ttl: float = 43200) -> Dict:
+        """
+        加载市场信息，优先使用磁盘缓存
+        
+        市场列表一天内几乎不变，缓存在有效期内时直接载入，
+        省去每次启动下载完整市场数据的请求
+        
+        Args:
+            ttl: 缓存有效秒数，默认12小时
+            
+        Returns:
+            市场信息字典
+        """
+        path = os.path.join(self.MARKETS_CACHE_DIR, f"markets_{self.exchange.id}.json")
+        
+        try:
+            if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+                with open(path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                return self.exchange.set_markets(cached['markets'], cached.get('currencies'))
+        except Exception as e:
+            self.logger.warning(f"Error loading markets cache {path}: {str(e)}")
+        
+        markets = self.exchange.load_markets()
+        
+        try:
+            os.makedirs(self.MARKETS_CACHE_DIR, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'markets': self.exchange.markets,
+                    'currencies': self.exchange.currencies
+                }, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Error saving markets cache {path}: {str(e)}")
+        
+        return markets
+    
+    def _fetch_free_balance(self, currency: str, params: Dict) -> float:
+        """
+        按交易所参数只查询所需资产的可用余额
+        
+        交易所不支持该过滤参数时退回到查询全部资产
+        
+        Args:
+            currency: 币种
+            params: 缩小余额查询范围的交易所参数
+            
+        Returns:
+            可用余额
+        """
+        import ccxt
+        
+        try:
+            balance = self.client.fetch_balance(params)
+        except (ccxt.NotSupported, ccxt.BadRequest) as e:
+            self.logger.warning(f"Scoped balance query failed, fetching all assets: {str(e)}")
+            balance = self.client.fetch_balance()
+        return balance['free'].get(currency, 0)
     
     @abstractmethod
     def connect(self) -> bool:
@@ -49,13 +153,15 @@ class BaseExchange(ABC):
         pass
     
     @abstractmethod
-    def market_buy(self, symbol: str, amount_usdt: float) -> Dict:
+    def market_buy(self, symbol: str, amount_usdt: float,
+                   price: Optional[float] = None) -> Dict:
         """
         市价买入
         
         Args:
             symbol: 交易对，如 "BTC/USDT"
             amount_usdt: 买入金额（USDT）
+            price: 当前价格（调用方已知时传入，部分交易所用于换算买入数量）
             
         Returns:
             订单信息
@@ -83,7 +189,7 @@ class BaseExchange(ABC):
             是否连接成功
         """
         try:
-            self.connect()
+            # get_balance在未连接时会自动连接
             balance = self.get_balance("USDT")
             self.logger.info(f"Connection test successful. USDT balance: {balance}")
             return True
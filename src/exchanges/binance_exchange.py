@@ -1,8 +1,7 @@
 """
 Binance交易所实现
 """
-from typing import Dict
-import ccxt
+from typing import Dict, Optional
 from src.exchanges.base_exchange import BaseExchange
 
 
@@ -11,18 +10,21 @@ class BinanceExchange(BaseExchange):
     
     def connect(self) -> bool:
         """连接到Binance"""
+        import ccxt  # 首次连接时才导入
+        
         try:
             self.exchange = ccxt.binance({
                 'apiKey': self.api_key,
                 'secret': self.api_secret,
                 'enableRateLimit': True,
+                'session': self.session,
                 'options': {
                     'defaultType': 'spot',  # 现货交易
                 }
             })
             
-            # 测试连接
-            self.exchange.load_markets()
+            # 测试连接（市场信息使用磁盘缓存）
+            self._load_markets_cached()
             self.logger.info("Connected to Binance")
             return True
             
@@ -33,36 +35,32 @@ class BinanceExchange(BaseExchange):
     def get_balance(self, currency: str = "USDT") -> float:
         """获取账户余额"""
         try:
-            if not self.exchange:
-                self.connect()
-            
-            balance = self.exchange.fetch_balance()
-            free_balance = balance['free'].get(currency, 0)
+            # 只返回非零余额的资产，避免拉取整个账户的资产列表
+            free_balance = self._fetch_free_balance(currency, {'omitZeroBalances': True})
             
-            self.logger.debug(f"Binance {currency} balance: {free_balance}")
+            self.logger.debug("Binance %s balance: %s", currency, free_balance)
             return free_balance
             
         except Exception as e:
             self.logger.error(f"Failed to get balance from Binance: {str(e)}")
             raise
     
-    def market_buy(self, symbol: str, amount_usdt: float) -> Dict:
+    def market_buy(self, symbol: str, amount_usdt: float,
+                   price: Optional[float] = None) -> Dict:
         """
         市价买入
         
         Args:
             symbol: 交易对，如 "BTC/USDT"
             amount_usdt: 买入金额（USDT）
+            price: 当前价格（按金额下单，不需要价格）
             
         Returns:
             订单信息
         """
         try:
-            if not self.exchange:
-                self.connect()
-            
             # 使用市价买单（按金额买入）
-            order = self.exchange.create_market_buy_order(
+            order = self.client.create_market_buy_order(
                 symbol,
                 None,  # amount参数设为None
                 {
@@ -84,10 +82,7 @@ class BinanceExchange(BaseExchange):
     def get_ticker(self, symbol: str) -> Dict:
         """获取行情信息"""
         try:
-            if not self.exchange:
-                self.connect()
-            
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self.client.fetch_ticker(symbol)
             return ticker
             
         except Exception as e:
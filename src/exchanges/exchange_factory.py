@@ -4,9 +4,6 @@
 """
 from typing import Dict
 from src.exchanges.base_exchange import BaseExchange
-from src.exchanges.binance_exchange import BinanceExchange
-from src.exchanges.okx_exchange import OKXExchange
-from src.exchanges.bitget_exchange import BitgetExchange
 
 
 class ExchangeFactory:
@@ -26,18 +23,22 @@ class ExchangeFactory:
         """
         exchange_name = exchange_name.lower()
         
+        # 只导入选中的交易所实现，其余模块不加载
         if exchange_name == 'binance':
+            from src.exchanges.binance_exchange import BinanceExchange
             return BinanceExchange(
                 api_key=credentials['api_key'],
                 api_secret=credentials['api_secret']
             )
         elif exchange_name == 'okx':
+            from src.exchanges.okx_exchange import OKXExchange
             return OKXExchange(
                 api_key=credentials['api_key'],
                 api_secret=credentials['api_secret'],
                 passphrase=credentials.get('passphrase', '')
             )
         elif exchange_name == 'bitget':
+            from src.exchanges.bitget_exchange import BitgetExchange
             return BitgetExchange(
                 api_key=credentials['api_key'],
                 api_secret=credentials['api_secret'],
@@ -1,8 +1,7 @@
 """
 OKX交易所实现
 """
-from typing import Dict
-import ccxt
+from typing import Dict, Optional
 from src.exchanges.base_exchange import BaseExchange
 
 
@@ -11,19 +10,22 @@ class OKXExchange(BaseExchange):
     
     def connect(self) -> bool:
         """连接到OKX"""
+        import ccxt  # 首次连接时才导入
+        
         try:
             self.exchange = ccxt.okx({
                 'apiKey': self.api_key,
                 'secret': self.api_secret,
                 'password': self.passphrase,  # OKX需要passphrase
                 'enableRateLimit': True,
+                'session': self.session,
                 'options': {
                     'defaultType': 'spot',  # 现货交易
                 }
             })
             
-            # 测试连接
-            self.exchange.load_markets()
+            # 测试连接（市场信息使用磁盘缓存）
+            self._load_markets_cached()
             self.logger.info("Connected to OKX")
             return True
             
@@ -34,43 +36,41 @@ class OKXExchange(BaseExchange):
     def get_balance(self, currency: str = "USDT") -> float:
         """获取账户余额"""
         try:
-            if not self.exchange:
-                self.connect()
-            
-            balance = self.exchange.fetch_balance()
-            free_balance = balance['free'].get(currency, 0)
+            # 只查询指定币种，避免拉取整个账户的资产列表
+            free_balance = self._fetch_free_balance(currency, {'ccy': currency})
             
-            self.logger.debug(f"OKX {currency} balance: {free_balance}")
+            self.logger.debug("OKX %s balance: %s", currency, free_balance)
             return free_balance
             
         except Exception as e:
             self.logger.error(f"Failed to get balance from OKX: {str(e)}")
             raise
     
-    def market_buy(self, symbol: str, amount_usdt: float) -> Dict:
+    def market_buy(self, symbol: str, amount_usdt: float,
+                   price: Optional[float] = None) -> Dict:
         """
         市价买入
         
         Args:
             symbol: 交易对，如 "BTC/USDT"
             amount_usdt: 买入金额（USDT）
+            price: 当前价格，用于换算买入数量；为None时查询行情
             
         Returns:
             订单信息
         """
         try:
-            if not self.exchange:
-                self.connect()
-            
-            # 获取当前价格以计算数量
-            ticker = self.exchange.fetch_ticker(symbol)
-            current_price = ticker['last']
+            # 获取当前价格以计算数量（调用方已提供时不再请求行情）
+            if price is not None:
+                current_price = price
+            else:
+                current_price = self.client.fetch_ticker(symbol)['last']
             
             # 计算购买数量
             amount = amount_usdt / current_price
             
             # 创建市价买单
-            order = self.exchange.create_market_buy_order(symbol, amount)
+            order = self.client.create_market_buy_order(symbol, amount)
             
             self.logger.info(
                 f"OKX market buy order created: {symbol}, "
@@ -86,10 +86,7 @@ class OKXExchange(BaseExchange):
     def get_ticker(self, symbol: str) -> Dict:
         """获取行情信息"""
         try:
-            if not self.exchange:
-                self.connect()
-            
-            ticker = self.exchange.fetch_ticker(symbol)
+            ticker = self.client.fetch_ticker(symbol)
             return ticker
             
         except Exception as e:
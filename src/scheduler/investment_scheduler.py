@@ -2,10 +2,9 @@
 定时调度器模块
 负责定时执行定投策略
 """
-import schedule
 import time
-from datetime import datetime
-import pytz
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from typing import Callable
 from src.utils.logger import get_logger
 
@@ -13,6 +12,9 @@ from src.utils.logger import get_logger
 class InvestmentScheduler:
     """定时调度器"""
     
+    # 单次睡眠上限（秒），系统休眠或时钟调整后最多延迟这么久重新校准
+    MAX_SLEEP = 3600
+    
     def __init__(self, 
                  execute_func: Callable,
                  hour: int = 0,
@@ -30,7 +32,7 @@ class InvestmentScheduler:
         self.execute_func = execute_func
         self.hour = hour
         self.minute = minute
-        self.timezone = pytz.timezone(timezone)
+        self.timezone = ZoneInfo(timezone)
         self.logger = get_logger()
         
         self.logger.info(
@@ -40,9 +42,18 @@ class InvestmentScheduler:
     def schedule_daily(self):
         """设置每日定时任务"""
         time_str = f"{self.hour:02d}:{self.minute:02d}"
-        schedule.every().day.at(time_str).do(self._run_with_error_handling)
-        
-        self.logger.info(f"Daily task scheduled at {time_str}")
+        self.logger.info(f"Daily task scheduled at {time_str} {self.timezone.key}")
+    
+    def _next_run_time(self) -> datetime:
+        """计算下次执行时间（按配置时区）"""
+        now = datetime.now(self.timezone)
+        target = datetime(now.year, now.month, now.day, self.hour, self.minute,
+                          tzinfo=self.timezone)
+        if target <= now:
+            next_day = now.date() + timedelta(days=1)
+            target = datetime(next_day.year, next_day.month, next_day.day,
+                              self.hour, self.minute, tzinfo=self.timezone)
+        return target
     
     def _run_with_error_handling(self):
         """带错误处理的执行函数"""
@@ -60,15 +71,19 @@ class InvestmentScheduler:
         self.logger.info("Scheduler started, waiting for scheduled time...")
         self.logger.info("Press Ctrl+C to stop")
         
-        # 显示下次执行时间
-        next_run = schedule.next_run()
-        if next_run:
-            self.logger.info(f"Next run scheduled at: {next_run}")
-        
         try:
             while True:
-                schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次
+                next_run = self._next_run_time()
+                self.logger.info(f"Next run scheduled at: {next_run}")
+                
+                # 直接睡到执行时间，提前醒来时继续等待
+                while True:
+                    remaining = next_run.timestamp() - time.time()
+                    if remaining <= 0:
+                        break
+                    time.sleep(min(remaining, self.MAX_SLEEP))
+                
+                self._run_with_error_handling()
         except KeyboardInterrupt:
             self.logger.info("Scheduler stopped by user")
     
@@ -3,11 +3,12 @@
 根据AHR999指标执行定投策略
 """
 from typing import Dict, Optional
+from collections import deque
 from src.data.ahr999_calculator import AHR999Calculator
 from src.exchanges.base_exchange import BaseExchange
 from src.utils.logger import get_logger
 from datetime import datetime
-import json
+import orjson
 import os
 
 
@@ -39,8 +40,9 @@ class InvestmentStrategy:
         self.symbol = config['strategy']['symbol']
         self.min_balance = config['security']['min_balance']
         
-        # 投资记录文件
-        self.history_file = "logs/investment_history.json"
+        # 投资记录文件（JSON Lines，每行一条记录，只追加不重写）
+        self.history_file = "logs/investment_history.jsonl"
+        self._migrate_legacy_history("logs/investment_history.json")
     
     def execute(self, dry_run: bool = False) -> Dict:
         """
@@ -53,9 +55,11 @@ class InvestmentStrategy:
             执行结果
         """
         try:
-            self.logger.info("=" * 60)
-            self.logger.info("Starting investment strategy execution")
-            self.logger.info(f"Dry run mode: {dry_run}")
+            self.logger.info(
+                "=" * 60 + "\n"
+                "Starting investment strategy execution\n"
+                f"Dry run mode: {dry_run}"
+            )
             
             # 检查今日是否已经执行过
             if not dry_run and self._has_invested_today():
@@ -100,7 +104,7 @@ class InvestmentStrategy:
                     'reason': reason
                 }
             
-            # 检查余额
+            # 检查余额（只在决定买入后查询，HOLD时不发起需签名的余额请求）
             balance = self.exchange.get_balance("USDT")
             self.logger.info(f"Current USDT balance: {balance:.2f}")
             
@@ -138,10 +142,10 @@ class InvestmentStrategy:
             else:
                 # 实际执行交易
                 self.logger.info(f"Executing market buy: {invest_amount} USDT")
-                order = self.exchange.market_buy(self.symbol, invest_amount)
+                current_price = details['current_price']
+                order = self.exchange.market_buy(self.symbol, invest_amount, price=current_price)
                 
                 # 记录交易
-                current_price = details['current_price']
                 btc_amount = invest_amount / current_price
                 
                 self.logger.log_trade(
@@ -177,8 +181,7 @@ class InvestmentStrategy:
                     'reason': reason
                 }
             
-            self.logger.info("Investment strategy execution completed")
-            self.logger.info("=" * 60)
+            self.logger.info("Investment strategy execution completed\n" + "=" * 60)
             
             return result
             
@@ -187,19 +190,26 @@ class InvestmentStrategy:
             raise
     
     def _has_invested_today(self) -> bool:
-        """检查今天是否已经投资过"""
+        """检查今天是否已经投资过（只读取文件末尾的最近记录）"""
         if not os.path.exists(self.history_file):
             return False
         
         try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
+            # 文件今天没有被写过时不可能有今天的记录，无需解析
+            today = datetime.now().date()
+            if datetime.fromtimestamp(os.path.getmtime(self.history_file)).date() != today:
+                return False
             
-            today = datetime.now().date().isoformat()
+            with open(self.history_file, 'rb') as f:
+                recent = deque(f, maxlen=32)
             
-            for record in history:
-                record_date = datetime.fromisoformat(record['timestamp']).date().isoformat()
-                if record_date == today:
+            # ISO时间戳以YYYY-MM-DD开头，直接比较日期前缀
+            today_prefix = today.isoformat()
+            for line in reversed(recent):
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                if record['timestamp'][:10] == today_prefix:
                     return True
             
             return False
@@ -209,26 +219,42 @@ class InvestmentStrategy:
             return False
     
     def _save_investment_record(self, record: Dict):
-        """保存投资记录"""
+        """保存投资记录（追加一行到JSONL文件）"""
         try:
             # 确保目录存在
             os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
             
-            # 读取现有记录
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    history = json.load(f)
-            else:
-                history = []
-            
-            # 添加新记录
-            history.append(record)
-            
-            # 保存
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2, default=str)
+            with open(self.history_file, 'ab') as f:
+                f.write(self._dump_record(record))
             
             self.logger.info("Investment record saved")
             
         except Exception as e:
             self.logger.error(f"Error saving investment record: {str(e)}")
+    
+    @staticmethod
+    def _dump_record(record: Dict) -> bytes:
+        """序列化一条投资记录为JSONL行（datetime和NumPy数值由orjson直接处理）"""
+        return orjson.dumps(
+            record,
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+        )
+    
+    def _migrate_legacy_history(self, legacy_file: str):
+        """将旧版JSON数组格式的投资记录一次性转换为JSONL"""
+        if os.path.exists(self.history_file) or not os.path.exists(legacy_file):
+            return
+        
+        try:
+            with open(legacy_file, 'rb') as f:
+                history = orjson.loads(f.read())
+            
+            with open(self.history_file, 'wb') as f:
+                for record in history:
+                    f.write(self._dump_record(record))
+            
+            self.logger.info(f"Migrated {len(history)} investment records to {self.history_file}")
+            
+        except Exception as e:
+            self.logger.warning(f"Error migrating investment history: {str(e)}")
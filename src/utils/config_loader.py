@@ -7,10 +7,33 @@ import yaml
 from dotenv import load_dotenv
 from typing import Dict, Any
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C实现
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 class ConfigLoader:
     """配置加载器"""
     
+    # 各交易所凭证字段与环境变量的对应关系
+    _EXCHANGE_ENV_MAP = {
+        'binance': {
+            'api_key': 'BINANCE_API_KEY',
+            'api_secret': 'BINANCE_API_SECRET',
+        },
+        'okx': {
+            'api_key': 'OKX_API_KEY',
+            'api_secret': 'OKX_API_SECRET',
+            'passphrase': 'OKX_PASSPHRASE',
+        },
+        'bitget': {
+            'api_key': 'BITGET_API_KEY',
+            'api_secret': 'BITGET_API_SECRET',
+            'passphrase': 'BITGET_PASSPHRASE',
+        },
+    }
+    
     def __init__(self, config_path: str = "config.yaml"):
         """
         初始化配置加载器
@@ -20,7 +43,8 @@ class ConfigLoader:
         """
         self.config_path = config_path
         self.config: Dict[str, Any] = {}
-        self.env_vars: Dict[str, str] = {}
+        self._flat: Dict[str, Any] = {}
+        self.env_vars: Dict[str, Dict[str, str]] = {}
         
     def load(self) -> Dict[str, Any]:
         """
@@ -34,7 +58,10 @@ class ConfigLoader:
         
         # 加载YAML配置
         with open(self.config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
+            self.config = yaml.load(f, Loader=_YamlLoader)
+        
+        # 预先展开点号路径，get时直接查表
+        self._flat = self._flatten(self.config or {})
         
         # 加载环境变量中的API密钥
         self._load_env_vars()
@@ -43,19 +70,10 @@ class ConfigLoader:
     
     def _load_env_vars(self):
         """加载环境变量"""
-        # Binance
-        self.env_vars['binance_api_key'] = os.getenv('BINANCE_API_KEY', '')
-        self.env_vars['binance_api_secret'] = os.getenv('BINANCE_API_SECRET', '')
-        
-        # OKX
-        self.env_vars['okx_api_key'] = os.getenv('OKX_API_KEY', '')
-        self.env_vars['okx_api_secret'] = os.getenv('OKX_API_SECRET', '')
-        self.env_vars['okx_passphrase'] = os.getenv('OKX_PASSPHRASE', '')
-        
-        # Bitget
-        self.env_vars['bitget_api_key'] = os.getenv('BITGET_API_KEY', '')
-        self.env_vars['bitget_api_secret'] = os.getenv('BITGET_API_SECRET', '')
-        self.env_vars['bitget_passphrase'] = os.getenv('BITGET_PASSPHRASE', '')
+        self.env_vars = {
+            exchange: {field: os.getenv(env_name, '') for field, env_name in fields.items()}
+            for exchange, fields in self._EXCHANGE_ENV_MAP.items()
+        }
     
     def get_exchange_config(self, exchange_name: str) -> Dict[str, str]:
         """
@@ -69,24 +87,9 @@ class ConfigLoader:
         """
         exchange_name = exchange_name.lower()
         
-        if exchange_name == 'binance':
-            return {
-                'api_key': self.env_vars['binance_api_key'],
-                'api_secret': self.env_vars['binance_api_secret']
-            }
-        elif exchange_name == 'okx':
-            return {
-                'api_key': self.env_vars['okx_api_key'],
-                'api_secret': self.env_vars['okx_api_secret'],
-                'passphrase': self.env_vars['okx_passphrase']
-            }
-        elif exchange_name == 'bitget':
-            return {
-                'api_key': self.env_vars['bitget_api_key'],
-                'api_secret': self.env_vars['bitget_api_secret'],
-                'passphrase': self.env_vars['bitget_passphrase']
-            }
-        else:
+        try:
+            return dict(self.env_vars[exchange_name])
+        except KeyError:
             raise ValueError(f"Unsupported exchange: {exchange_name}")
     
     def validate(self) -> bool:
@@ -122,13 +125,15 @@ class ConfigLoader:
         Returns:
             配置值
         """
-        keys = key_path.split('.')
-        value = self.config
-        
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
-        
-        return value
+        return self._flat.get(key_path, default)
+    
+    @classmethod
+    def _flatten(cls, config: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """将嵌套配置展开为 {点号路径: 值}，中间层级的字典也保留"""
+        flat = {}
+        for key, value in config.items():
+            path = f"{prefix}{key}"
+            flat[path] = value
+            if isinstance(value, dict):
+                flat.update(cls._flatten(value, path + "."))
+        return flat
@@ -3,10 +3,10 @@
 提供统一的日志记录功能
 """
 import os
+import sys
 import logging
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
-import colorlog
 
 
 class Logger:
@@ -62,23 +62,32 @@ class Logger:
             log_file,
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5,
-            encoding='utf-8'
+            encoding='utf-8',
+            delay=True  # 首次写入日志时才打开文件
         )
         file_handler.setLevel(self.log_level)
         file_handler.setFormatter(file_formatter)
         
-        # 控制台处理器（带颜色）
-        console_formatter = colorlog.ColoredFormatter(
-            '%(log_color)s%(asctime)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S',
-            log_colors={
-                'DEBUG': 'cyan',
-                'INFO': 'green',
-                'WARNING': 'yellow',
-                'ERROR': 'red',
-                'CRITICAL': 'red,bg_white',
-            }
-        )
+        # 控制台处理器（终端中带颜色，重定向到文件或日志系统时使用普通格式）
+        if sys.stderr.isatty():
+            import colorlog
+            
+            console_formatter = colorlog.ColoredFormatter(
+                '%(log_color)s%(asctime)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S',
+                log_colors={
+                    'DEBUG': 'cyan',
+                    'INFO': 'green',
+                    'WARNING': 'yellow',
+                    'ERROR': 'red',
+                    'CRITICAL': 'red,bg_white',
+                }
+            )
+        else:
+            console_formatter = logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
         
         console_handler = logging.StreamHandler()
         console_handler.setLevel(self.log_level)
@@ -88,25 +97,29 @@ class Logger:
         self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
     
-    def debug(self, message: str):
-        """调试日志"""
-        self.logger.debug(message)
+    def isEnabledFor(self, level: int) -> bool:
+        """指定级别的日志是否会被输出，用于跳过昂贵的消息构造"""
+        return self.logger.isEnabledFor(level)
+    
+    def debug(self, message: str, *args):
+        """调试日志（传入args时按%格式延迟到输出时才格式化）"""
+        self.logger.debug(message, *args)
     
-    def info(self, message: str):
+    def info(self, message: str, *args):
         """信息日志"""
-        self.logger.info(message)
+        self.logger.info(message, *args)
     
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         """警告日志"""
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
     
-    def error(self, message: str):
+    def error(self, message: str, *args):
         """错误日志"""
-        self.logger.error(message)
+        self.logger.error(message, *args)
     
-    def critical(self, message: str):
+    def critical(self, message: str, *args):
         """严重错误日志"""
-        self.logger.critical(message)
+        self.logger.critical(message, *args)
     
     def log_trade(self, exchange: str, symbol: str, amount: float, 
                   price: float, total: float, ahr999: float):
@@ -5,7 +5,7 @@ from src.data.price_fetcher import PriceFetcher
 
 genesis_date = datetime(2009, 1, 3)
 fetcher = PriceFetcher('binance')
-data = fetcher.get_historical_prices('BTC/USDT', days=1200)
+data = fetcher.get_historical_prices_legacy('BTC/USDT', days=1200)
 
 print('2023年5-9月 AHR999值验证:')
 print('='*80)
@@ -7,27 +7,35 @@ import matplotlib
 matplotlib.use('Agg')  # 使用非交互式后端
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from datetime import datetime, timedelta
+from matplotlib.ticker import StrMethodFormatter
 import numpy as np
+from src.data.ahr999_calculator import AHR999Calculator
 from src.data.price_fetcher import PriceFetcher
 from src.utils.logger import get_logger
 
+try:
+    import numexpr as ne
+except ImportError:  # numexpr为可选依赖，未安装时使用NumPy计算
+    ne = None
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 折线路径简化：合并亚像素级的近共线顶点，减少Agg绘制的线段数
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+
 
 def calculate_ma(prices, window=200):
-    """计算移动平均"""
-    if len(prices) < window:
-        return [np.nan] * len(prices)
-    
-    ma = []
-    for i in range(len(prices)):
-        if i < window - 1:
-            ma.append(np.nan)
-        else:
-            ma.append(np.mean(prices[i-window+1:i+1]))
+    """计算移动平均（卷积滑动窗口，前window-1个值为NaN）"""
+    p = np.asarray(prices, dtype=np.float64)
+    ma = np.full(len(p), np.nan)
+    if len(p) < window:
+        return ma
+    
+    # 每个窗口独立求和，不像累积和那样在长序列上累积浮点误差
+    ma[window - 1:] = np.convolve(p, np.ones(window) / window, mode='valid')
     return ma
 
 
@@ -36,23 +44,73 @@ def calculate_fitted_prices_from_data(dates, prices):
     使用AHR999标准公式计算拟合价格
     标准公式: Price = 10^(5.84 * log10(coin_age_days) - 17.01)
     """
-    genesis_date = datetime(2009, 1, 3)
-    
-    fitted_prices = []
-    for date in dates:
-        days_since_genesis = (date - genesis_date).days
-        
-        # AHR999标准公式
-        if days_since_genesis > 0:
-            fitted_price = 10 ** (5.84 * np.log10(days_since_genesis) - 17.01)
-        else:
-            fitted_price = 1
-        
-        fitted_prices.append(fitted_price)
+    dates_np = np.asarray(dates, dtype='datetime64[D]')
+    days_since_genesis = (dates_np - np.datetime64('2009-01-03')).astype(np.int64)
+    
+    # AHR999标准公式（创世区块之前的日期取1）
+    fitted_prices = np.ones(len(days_since_genesis))
+    mask = days_since_genesis > 0
+    days = days_since_genesis[mask].astype(np.float64)
+    if ne is not None:
+        # numexpr单次遍历完成log10、乘加和幂运算，不产生中间数组
+        fitted_prices[mask] = ne.evaluate("10 ** (5.84 * log10(days) - 17.01)")
+    else:
+        fitted_prices[mask] = 10 ** (5.84 * np.log10(days) - 17.01)
     
     return fitted_prices
 
 
+def minmax_downsample(x, values, n_out):
+    """
+    MinMax降采样：将序列分成n_out/2个桶，每桶保留最小值和最大值两个点
+    
+    点数不超过n_out时原样返回；NaN/inf不参与极值选取，全为无效值的桶保留一个点，折线在此断开
+    
+    Returns:
+        (降采样后的横坐标, 降采样后的值)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= n_out:
+        return x, values
+    
+    bucket_size = -(-n // max(1, n_out // 2))
+    n_buckets = -(-n // bucket_size)
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, bucket_size)
+    
+    invalid = ~np.isfinite(buckets)
+    lo = np.where(invalid, np.inf, buckets).argmin(axis=1)
+    hi = np.where(invalid, -np.inf, buckets).argmax(axis=1)
+    
+    offsets = np.arange(n_buckets) * bucket_size
+    idx = np.sort(np.stack((lo, hi), axis=1), axis=1) + offsets[:, None]
+    idx = np.minimum(idx.ravel(), n - 1)
+    return np.asarray(x)[idx], values[idx]
+
+
+# 长期运行的进程中复用同一个画布，避免每次重新创建Figure和渲染器
+_FIG = None
+_AX1 = None
+_AX2 = None
+
+
+def _get_fig(figsize):
+    """获取图表画布，已存在时清空后复用"""
+    global _FIG, _AX1, _AX2
+    
+    if _FIG is None:
+        _FIG, (_AX1, _AX2) = plt.subplots(2, 1, figsize=figsize,
+                                          gridspec_kw={'height_ratios': [1, 2]},
+                                          constrained_layout=True)
+    else:
+        _AX1.clear()
+        _AX2.clear()
+    
+    return _FIG, _AX1, _AX2
+
+
 def main():
     logger = get_logger()
     logger.info("Fetching historical data for visualization...")
@@ -60,65 +118,65 @@ def main():
     # 获取历史数据（3年+的数据用于可视化）
     fetcher = PriceFetcher("binance")
     days = 1200  # 获取3年以上数据以便有足够的200日MA
-    historical_data = fetcher.get_historical_prices("BTC/USDT", days=days)
-    
-    # 提取数据
-    dates = [d[0] for d in historical_data]
-    prices = [d[1] for d in historical_data]
+    dates, prices = fetcher.get_historical_prices("BTC/USDT", days=days)
     
     logger.info(f"Fetched {len(dates)} days of data from {dates[0]} to {dates[-1]}")
     
-    # 计算200日移动平均
+    # 计算200日移动平均（需要完整历史作为窗口）
     ma_200 = calculate_ma(prices, 200)
     
-    # 计算拟合价格（使用AHR999标准公式）
-    fitted_prices = calculate_fitted_prices_from_data(dates, prices)
+    # 计算AHR999（复用计算器的融合内核，与实盘同一口径；前199天为NaN）
+    calculator = AHR999Calculator(fetcher, ma_days=200)
+    ahr999_values = calculator.calculate_series(prices, dates)
     
-    logger.info(f"Using standard AHR999 fitted price formula: 10^(5.84*log10(days)-17.01)")
+    # 只保留最近三年（约1095天）的显示区间，后续计算和绘图都在该区间上进行
+    display_days = min(1095, len(dates))
+    start = len(dates) - display_days
+    dates = dates[start:]
+    prices = prices[start:]
+    ma_200 = ma_200[start:]
+    ahr999_values = ahr999_values[start:]
     
-    # 计算AHR999
-    ahr999_values = []
-    for i in range(len(prices)):
-        if np.isnan(ma_200[i]):
-            ahr999_values.append(np.nan)
-        else:
-            ahr999 = (prices[i] / ma_200[i]) * (prices[i] / fitted_prices[i])
-            ahr999_values.append(ahr999)
+    # 计算拟合价格（使用AHR999标准公式，用于绘制拟合曲线）
+    fitted_prices = calculate_fitted_prices_from_data(dates, prices)
     
-    # 显示最近三年的数据（约1095天）
-    display_days = min(1095, len(dates))
-    dates_display = dates[-display_days:]
-    prices_display = prices[-display_days:]
-    ma_200_display = ma_200[-display_days:]
-    fitted_prices_display = fitted_prices[-display_days:]
-    ahr999_values_display = ahr999_values[-display_days:]
+    logger.info(f"Using standard AHR999 fitted price formula: 10^(5.84*log10(days)-17.01)")
     
     # 创建图表（调整比例，让AHR999图更显眼）
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 12), 
-                                    gridspec_kw={'height_ratios': [1, 2]})
+    figsize = (16, 12)
+    dpi = 300
+    fig, ax1, ax2 = _get_fig(figsize)
+    
+    # 数据点多于图宽像素时做MinMax降采样，保留每段的极值
+    # （当前值和标题仍使用完整数据）
+    target_points = int(figsize[0] * dpi)
+    # 日期只转换一次为matplotlib数值横坐标，绘制时不再逐点转换
+    x = mdates.date2num(dates)
+    plot_price_x, plot_prices = minmax_downsample(x, prices, target_points)
+    plot_ma_x, plot_ma_200 = minmax_downsample(x, ma_200, target_points)
+    plot_fitted_x, plot_fitted = minmax_downsample(x, fitted_prices, target_points)
+    plot_ahr999_x, plot_ahr999 = minmax_downsample(x, ahr999_values, target_points)
     
     # 上半部分：价格图
-    ax1_right = ax1.twinx()
-    
     # 绘制价格线
-    line1 = ax1.plot(dates_display, prices_display, 'b-', linewidth=1.5, 
-                     label='BTC价格', alpha=0.8)
+    line1 = ax1.plot(plot_price_x, plot_prices, 'b-', linewidth=1.5, 
+                     label='BTC价格', alpha=0.8, rasterized=True)
     
     # 绘制200日定投成本
-    line2 = ax1.plot(dates_display, ma_200_display, 'orange', linewidth=2, 
+    line2 = ax1.plot(plot_ma_x, plot_ma_200, 'orange', linewidth=2, 
                      label='200日定投成本', alpha=0.8)
     
     # 绘制拟合价格
-    line3 = ax1.plot(dates_display, fitted_prices_display, 'green', linewidth=2, 
+    line3 = ax1.plot(plot_fitted_x, plot_fitted, 'green', linewidth=2, 
                      label='拟合价格', alpha=0.7, linestyle='--')
     
     # 设置价格轴
     ax1.set_ylabel('价格 (USDT)', fontsize=12, fontweight='bold')
-    ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    ax1.yaxis.set_major_formatter(StrMethodFormatter('${x:,.0f}'))
     ax1.grid(True, alpha=0.3)
     
     # 下半部分：AHR999指标
-    ax2.plot(dates_display, ahr999_values_display, 'b-', linewidth=2, 
+    ax2.plot(plot_ahr999_x, plot_ahr999, 'b-', linewidth=2, 
              label='AHR999指数', alpha=0.8)
     
     # 添加阈值线
@@ -127,21 +185,25 @@ def main():
     ax2.axhline(y=0.45, color='red', linestyle='-', linewidth=1.5, 
                 label='抄底线 (0.45)', alpha=0.7)
     
-    # 填充区域
-    ax2.fill_between(dates_display, 0, ahr999_values_display, 
-                     where=[v <= 0.45 if not np.isnan(v) else False for v in ahr999_values_display],
-                     color='red', alpha=0.2, label='抄底区域')
-    ax2.fill_between(dates_display, 0.45, ahr999_values_display,
-                     where=[(v > 0.45 and v <= 1.2) if not np.isnan(v) else False for v in ahr999_values_display],
-                     color='yellow', alpha=0.2, label='定投区域')
-    ax2.fill_between(dates_display, 1.2, ahr999_values_display,
-                     where=[v > 1.2 if not np.isnan(v) else False for v in ahr999_values_display],
-                     color='purple', alpha=0.15, label='观望区域')
+    # 填充区域（NaN参与比较结果为False，不会被填充）
+    bottom_mask = plot_ahr999 <= 0.45
+    dca_mask = (plot_ahr999 > 0.45) & (plot_ahr999 <= 1.2)
+    hold_mask = plot_ahr999 > 1.2
+    
+    ax2.fill_between(plot_ahr999_x, 0, plot_ahr999, 
+                     where=bottom_mask,
+                     color='red', alpha=0.2, label='抄底区域', rasterized=True)
+    ax2.fill_between(plot_ahr999_x, 0.45, plot_ahr999,
+                     where=dca_mask,
+                     color='yellow', alpha=0.2, label='定投区域', rasterized=True)
+    ax2.fill_between(plot_ahr999_x, 1.2, plot_ahr999,
+                     where=hold_mask,
+                     color='purple', alpha=0.15, label='观望区域', rasterized=True)
     
     # 设置AHR999轴
     ax2.set_ylabel('AHR999指数', fontsize=12, fontweight='bold')
     ax2.set_xlabel('日期', fontsize=12, fontweight='bold')
-    ax2.set_ylim(0, max([v for v in ahr999_values_display if not np.isnan(v)]) * 1.1)
+    ax2.set_ylim(0, np.nanmax(ahr999_values) * 1.1)
     ax2.grid(True, alpha=0.3)
     
     # 格式化x轴日期
@@ -155,17 +217,14 @@ def main():
     ax2.legend(loc='upper left', fontsize=10)
     
     # 添加标题
-    current_ahr999 = ahr999_values_display[-1]
-    current_price = prices_display[-1]
+    current_ahr999 = ahr999_values[-1]
+    current_price = prices[-1]
     fig.suptitle(f'比特币 AHR999 指标\n当前价格: ${current_price:,.2f} | 当前AHR999: {current_ahr999:.4f}', 
                  fontsize=16, fontweight='bold')
     
-    # 调整布局
-    plt.tight_layout()
-    
     # 保存图表
     output_file = 'ahr999_chart.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
     logger.info(f"Chart saved to {output_file}")
     
     # 不显示图表窗口，直接保存
@@ -174,8 +233,8 @@ def main():
     print(f"\n✅ 图表已生成并保存为: {output_file}")
     print(f"\n当前数据:")
     print(f"  BTC价格: ${current_price:,.2f}")
-    print(f"  200日定投成本: ${ma_200_display[-1]:,.2f}")
-    print(f"  拟合价格: ${fitted_prices_display[-1]:,.2f}")
+    print(f"  200日定投成本: ${ma_200[-1]:,.2f}")
+    print(f"  拟合价格: ${fitted_prices[-1]:,.2f}")
     print(f"  AHR999指数: {current_ahr999:.4f}")
     
     if current_ahr999 < 0.45: